@@ -25,3 +25,7 @@ EMAIL_CONFIG = {
 # Set to True to generate and send payslips for all months from joining date to the current month.
 # Set to False to only generate and send for the current month.
 SEND_ALL_PAST_PAYSLIPS = False
+
+# Number of parallel SMTP connections used to send emails.
+# Keep this below your provider's concurrency limit (Gmail allows ~15).
+CONCURRENCY = 4
@@ -1,17 +1,21 @@
 import os
 import io
+import copy
+import hashlib
 import json
+import time
 import logging
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 import pandas as pd
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
 from reportlab.lib import colors
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPDF
-import smtplib
+from reportlab.pdfbase.pdfmetrics import stringWidth
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from email.message import EmailMessage
 from email.utils import formataddr
 import calendar
@@ -22,7 +26,8 @@ from config import (
     COMPANY_ADDRESS,
     PRIMARY_COLOR_HEX,
     EMAIL_CONFIG,
-    SEND_ALL_PAST_PAYSLIPS
+    SEND_ALL_PAST_PAYSLIPS,
+    CONCURRENCY
 )
 
 # -------------------------
@@ -104,422 +109,623 @@ def create_dummy_excel(file_path):
     logger.info(f"Template created at {file_path}. Please open and fill employee rows.")
 
 
+# Columns the payslip actually uses; anything else in the sheet is skipped
+# at read time. Numeric columns are coerced to clean floats in one
+# vectorized pass so the PDF code never has to re-type per field.
+TEXT_COLS = [
+    "Employee ID", "FullName", "Date of Joining", "Department",
+    "Sub Department", "Designation", "Payment Mode", "Bank", "Bank IFSC",
+    "Bank Account", "PAN", "UAN", "PF Number", "Email",
+]
+NUMERIC_COLS = [
+    "Basic", "HRA", "Special Allowance", "Medical Allowance",
+    "Transport Allowance", "Professional Allowance", "Performance Pay",
+    "Courier Reimb", "Total Working Days", "Actual Payable Days",
+    "Professional Tax", "Performance Bonus", "Performance Bonus Recovery",
+    "PF",
+]
+REQUIRED_COLS = set(TEXT_COLS) | set(NUMERIC_COLS)
+
+# python-calamine parses xlsx several times faster than openpyxl; prefer it
+# when installed (pandas supports engine="calamine" since 2.2), otherwise
+# fall back to whatever engine pandas picks by default.
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
+def load_employees(file_path):
+    """Read the employee sheet and normalize types in one vectorized pass."""
+    df = pd.ExcelFile(file_path, engine=EXCEL_ENGINE).parse(0, usecols=lambda c: c in REQUIRED_COLS)
+    numeric_present = [c for c in NUMERIC_COLS if c in df.columns]
+    if numeric_present:
+        df[numeric_present] = df[numeric_present].apply(pd.to_numeric, errors="coerce").fillna(0.0).astype("float64")
+    if "Date of Joining" in df.columns:
+        df["Date of Joining"] = pd.to_datetime(df["Date of Joining"], errors="coerce", dayfirst=True)
+        # The payslip shows the joining date as e.g. "27 AUG 2025"; format it
+        # once per employee here instead of strftime-ing per month.
+        df["Date of Joining Display"] = df["Date of Joining"].dt.strftime("%d %b %Y").str.upper().fillna("N/A")
+    if "Employee ID" in df.columns:
+        # Employee ID keys the render cache and the sent-log row hashes; a
+        # duplicated ID would silently reuse one employee's payslip data for
+        # another, so refuse the sheet outright.
+        ids = df["Employee ID"].dropna()
+        dupes = ids[ids.duplicated()].unique()
+        if len(dupes):
+            raise ValueError(f"Duplicate Employee ID(s) in {file_path}: {', '.join(map(str, dupes))}")
+    return df
+
+
+# orjson serializes the sent log far faster than the stdlib; optional, the
+# compact stdlib form is the fallback. The log grows by one history entry
+# per run, so pretty-printing it was pure overhead.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def load_sent_log():
     if SENT_LOG_JSON.exists():
         try:
-            with open(SENT_LOG_JSON, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(SENT_LOG_JSON, "rb") as f:
+                data = f.read()
+            return orjson.loads(data) if orjson is not None else json.loads(data)
         except Exception:
             return {}
     return {}
 
 def save_sent_log(d):
-    with open(SENT_LOG_JSON, "w", encoding="utf-8") as f:
-        json.dump(d, f, indent=2)
+    if orjson is not None:
+        with open(SENT_LOG_JSON, "wb") as f:
+            f.write(orjson.dumps(d))
+    else:
+        with open(SENT_LOG_JSON, "w", encoding="utf-8") as f:
+            json.dump(d, f, separators=(",", ":"))
+
+def _row_hash(row_dict):
+    """Stable fingerprint of one employee row, for payslip invalidation."""
+    payload = json.dumps(row_dict, default=str, sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _row_hash_matches(row_hashes, hash_key, row_hash):
+    """True when the sent log recorded the same row data for this payslip."""
+    return row_hashes.get(hash_key) == row_hash
 
 def month_year_string(dt=None):
     dt = dt or datetime.now()
     return dt.strftime("%B"), dt.year
 
-def num_to_words_indian(n):
-    # integer to Indian words (simple version)
-    ones = ["","One","Two","Three","Four","Five","Six","Seven","Eight","Nine","Ten","Eleven","Twelve",
-            "Thirteen","Fourteen","Fifteen","Sixteen","Seventeen","Eighteen","Nineteen"]
-    tens = ["","","Twenty","Thirty","Forty","Fifty","Sixty","Seventy","Eighty","Ninety"]
-    def two(n):
-        if n < 20:
-            return ones[n]
-        else:
-            return tens[n//10] + ("" if n%10==0 else " " + ones[n%10])
-    def three(n):
-        s = ""
-        if n >= 100:
-            s += ones[n//100] + " Hundred"
-            if n%100:
-                s += " "
+# Lookup tables for num_to_words_indian, built once at import instead of on
+# every call.
+ONES = ["","One","Two","Three","Four","Five","Six","Seven","Eight","Nine","Ten","Eleven","Twelve",
+        "Thirteen","Fourteen","Fifteen","Sixteen","Seventeen","Eighteen","Nineteen"]
+TENS = ["","","Twenty","Thirty","Forty","Fifty","Sixty","Seventy","Eighty","Ninety"]
+
+def _two_words(n):
+    if n < 20:
+        return ONES[n]
+    else:
+        return TENS[n//10] + ("" if n%10==0 else " " + ONES[n%10])
+
+def _three_words(n):
+    s = ""
+    if n >= 100:
+        s += ONES[n//100] + " Hundred"
         if n%100:
-            s += two(n%100)
-        return s
+            s += " "
+    if n%100:
+        s += _two_words(n%100)
+    return s
+
+@lru_cache(maxsize=1024)
+def num_to_words_indian(n):
+    # integer to Indian words (simple version). Net salaries repeat across
+    # months and employees, so memoize the decomposition.
     if n == 0:
         return "Zero"
     parts = []
     crore = n // 10000000
     if crore:
-        parts.append(three(crore) + " Crore")
+        parts.append(_three_words(crore) + " Crore")
     n = n % 10000000
     lakh = n // 100000
     if lakh:
-        parts.append(three(lakh) + " Lakh")
+        parts.append(_three_words(lakh) + " Lakh")
     n = n % 100000
     thousand = n // 1000
     if thousand:
-        parts.append(three(thousand) + " Thousand")
+        parts.append(_three_words(thousand) + " Thousand")
     n = n % 1000
     if n:
-        parts.append(three(n))
+        parts.append(_three_words(n))
     return " ".join(parts)
 
 # -------------------------
 # ========== PDF BUILD =====
 # -------------------------
-def create_payslip_pdf(row, month_name, year, out_pdf_path, logo_svg_code):
-    """
-    Create the PDF matching the provided design.
+# Parsed (and pre-scaled) logo Drawing, cached per process. svg2rlg is an
+# XML parse plus graph construction — identical work for every payslip, so
+# do it once and hand out copies. Each ProcessPoolExecutor worker warms its
+# own cache; copies are cheap next to a re-parse.
+_LOGO_DRAWING_CACHE = {}
+
+def _get_logo_drawing(logo_svg_code):
+    drawing = _LOGO_DRAWING_CACHE.get(logo_svg_code)
+    if drawing is None:
+        # Deferred: svglib takes ~150ms to import and is only needed for the
+        # first parse in each process.
+        from svglib.svglib import svg2rlg
+        drawing = svg2rlg(io.StringIO(logo_svg_code))
+        scale_w = (40*mm) / drawing.width if drawing.width > 0 else 1.0
+        scale_h = (20*mm) / drawing.height if drawing.height > 0 else 1.0
+        scale = min(scale_w, scale_h, 1.0)
+        drawing.width *= scale
+        drawing.height *= scale
+        _LOGO_DRAWING_CACHE[logo_svg_code] = drawing
+    return copy.deepcopy(drawing)
+
+# Colors used throughout the payslip
+PAYSLIP_REGULAR_COLOR = colors.HexColor("#505050")
+TEXT_COLOR = colors.HexColor("#000000")
+LABEL_COLOR = colors.HexColor("#858585")
+LINE_COLOR = colors.HexColor("#DCDCDC")
+
+# Label rows for the three employee-detail grids; the data rows underneath
+# come from the employee record.
+GRID_LABELS = (
+    ("Employee Number", "Date Joined", "Department", "Sub Department"),
+    ("Designation", "Payment Mode", "Bank", "Bank IFSC"),
+    ("Bank Account", "PAN", "UAN", "PF Number"),
+)
+DAYS_TABLE_HEADERS = ("Actual Payable Days", "Total Working Days", "Loss of Pay Days", "Days Payable")
+
+# Earning lines: the first group is prorated by payable/working days, the
+# second is paid in full.
+PRORATE_ITEMS = ("Basic", "HRA", "Special Allowance")
+NON_PRORATE_ITEMS = ("Medical Allowance", "Transport Allowance", "Professional Allowance", "Performance Pay", "Courier Reimb")
+
+def _draw_amount_rows(c, label_x, amount_x, y, items):
+    """Draw preformatted (label, amount) rows walking down from y."""
+    draw_label = c.drawString
+    draw_amount = c.drawRightString
+    for label, amount in items:
+        draw_label(label_x, y, label)
+        draw_amount(amount_x, y, amount)
+        y -= 5 * mm
+    return y
+
+# ----- Layout constants -----
+# The payslip design is fixed (single A4 page, constant margins and row
+# heights), so every coordinate is known at import time. Computing them here
+# replaces the per-payslip y_pos walk the drawing code used to repeat.
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LEFT_MARGIN = 14 * mm
+RIGHT_MARGIN = 14 * mm
+USABLE_WIDTH = PAGE_WIDTH - LEFT_MARGIN - RIGHT_MARGIN
+TOP_MARGIN = PAGE_HEIGHT - 16 * mm
+GRID_COL_WIDTH = USABLE_WIDTH / 4
+DAYS_COL_WIDTH = USABLE_WIDTH / len(DAYS_TABLE_HEADERS)
+SAL_COL_WIDTH = USABLE_WIDTH * 0.5
+RIGHT_COL_X = LEFT_MARGIN + SAL_COL_WIDTH
+HORIZONTAL_PADDING = 5 * mm
+AMOUNT_RIGHT_X = LEFT_MARGIN + SAL_COL_WIDTH - 4 * mm
+DED_AMOUNT_RIGHT_X = RIGHT_COL_X + SAL_COL_WIDTH - 4 * mm
+
+TITLE_WIDTH = stringWidth("PAYSLIP", "Helvetica-Bold", 18)
+ADDRESS_LINES = COMPANY_ADDRESS.split("\n")
+
+TITLE_Y = TOP_MARGIN
+COMPANY_NAME_Y = TITLE_Y - 10 * mm
+ADDRESS_TOP_Y = COMPANY_NAME_Y - 5 * mm           # first address line; each next one 5mm lower
+EMP_NAME_Y = ADDRESS_TOP_Y - 5 * mm * len(ADDRESS_LINES) - 10 * mm
+NAME_RULE_Y = EMP_NAME_Y - 5 * mm
+
+# Each detail grid: label row, data row 4mm below, rule 5mm below that,
+# next grid 5mm further down.
+GRID_LABEL_YS = tuple(NAME_RULE_Y - 5 * mm - i * 14 * mm for i in range(len(GRID_LABELS)))
+GRID_DATA_YS = tuple(y - 4 * mm for y in GRID_LABEL_YS)
+GRID_RULE_YS = tuple(y - 9 * mm for y in GRID_LABEL_YS)
+
+SALARY_RULE_Y = GRID_RULE_YS[-1] - 10 * mm
+SALARY_TITLE_Y = SALARY_RULE_Y - 5 * mm
+SALARY_RULE2_Y = SALARY_TITLE_Y - 5 * mm
+DAYS_HEADER_Y = SALARY_RULE2_Y - 5 * mm
+DAYS_VALUES_Y = DAYS_HEADER_Y - 4 * mm
+DAYS_RULE_Y = DAYS_VALUES_Y - 5 * mm
+COLUMNS_TOP_Y = DAYS_RULE_Y - 10 * mm             # EARNINGS / TAXES & DEDUCTIONS titles
+ITEMS_TOP_Y = COLUMNS_TOP_Y - 7 * mm              # first earning/deduction row
+
+def _draw_static_chrome(c):
+    """Stamp the page furniture that is identical on every payslip.
+
+    Labels, rules and section titles never change between employees or
+    months, so they are recorded once as a ReportLab form and placed with a
+    single doForm() call; create_payslip_pdf only draws the values that
+    actually vary.
     """
-    WIDTH, HEIGHT = A4
-    c = canvas.Canvas(str(out_pdf_path), pagesize=A4)
-    left_margin = 14 * mm
-    right_margin = 14 * mm
-    usable_width = WIDTH - left_margin - right_margin
-    top_margin = HEIGHT - 16 * mm
-    y_pos = top_margin
-
-    # Define colors
-    PAYSLIP_REGULAR_COLOR = colors.HexColor("#505050")
-    TEXT_COLOR = colors.HexColor("#000000")
-    LABEL_COLOR = colors.HexColor("#858585")
-    LINE_COLOR = colors.HexColor("#DCDCDC")
-
-    # ----- Header Section -----
-    # Left side: PAYSLIP May 2023
+    c.beginForm("payslip_chrome")
+    c.saveState()
+
+    # "PAYSLIP" title (the month/year beside it is drawn per payslip)
     c.setFillColor(TEXT_COLOR)
     c.setFont("Helvetica-Bold", 18)
-    c.drawString(left_margin, y_pos, "PAYSLIP")
-    text_width_payslip = c.stringWidth("PAYSLIP", "Helvetica-Bold", 18)
-    c.setFillColor(PAYSLIP_REGULAR_COLOR)
-    c.setFont("Helvetica", 18)
-    c.drawString(left_margin + text_width_payslip, y_pos, f" {month_name.upper()} {year}")
-    y_pos -= 10 * mm
+    c.drawString(LEFT_MARGIN, TITLE_Y, "PAYSLIP")
 
     # Company name and address
-    c.setFillColor(TEXT_COLOR)
     c.setFont("Helvetica-Bold", 12)
-    c.drawString(left_margin, y_pos, COMPANY_NAME.upper())
-    y_pos -= 5 * mm
+    c.drawString(LEFT_MARGIN, COMPANY_NAME_Y, COMPANY_NAME.upper())
     c.setFont("Helvetica", 8)
-    address_lines = COMPANY_ADDRESS.split("\n")
-    for line in address_lines:
-        c.drawString(left_margin, y_pos, line)
-        y_pos -= 5 * mm
-
-    # Right side: Logo
-    if logo_svg_code:
-        try:
-            drawing = svg2rlg(io.StringIO(logo_svg_code))
-            scale_w = (40*mm) / drawing.width if drawing.width > 0 else 1.0
-            scale_h = (20*mm) / drawing.height if drawing.height > 0 else 1.0
-            scale = min(scale_w, scale_h, 1.0)
-            drawing.width *= scale
-            drawing.height *= scale
-
-            logo_x = WIDTH - right_margin - drawing.width
-            logo_y = top_margin - drawing.height - 10*mm
-
-            renderPDF.draw(drawing, c, logo_x, logo_y)
-        except Exception as e:
-            logger.warning(f"SVG render failed from embedded code: {e}")
-    
-    y_pos -= 10 * mm
+    for i, line in enumerate(ADDRESS_LINES):
+        c.drawString(LEFT_MARGIN, ADDRESS_TOP_Y - i * 5 * mm, line)
 
-    # ----- Employee Name & Line -----
-    c.setFillColor(TEXT_COLOR)
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(left_margin, y_pos, str(row.get("FullName", "")).upper())
-    y_pos -= 5 * mm
+    # Rule under the employee name
     c.setStrokeColor(TEXT_COLOR)
     c.setLineWidth(1.5)
-    c.line(left_margin, y_pos, left_margin + usable_width, y_pos)
-    y_pos -= 5 * mm
+    c.line(LEFT_MARGIN, NAME_RULE_Y, LEFT_MARGIN + USABLE_WIDTH, NAME_RULE_Y)
 
-    # ----- Employee Details Grid 1 -----
+    # Employee detail grids: label rows and rules
     c.setLineWidth(0.5)
-    col_width = usable_width / 4
-    
-    # Titles
     c.setFillColor(LABEL_COLOR)
     c.setFont("Helvetica", 7)
-    c.drawString(left_margin, y_pos, "Employee Number")
-    c.drawString(left_margin + col_width, y_pos, "Date Joined")
-    c.drawString(left_margin + col_width * 2, y_pos, "Department")
-    c.drawString(left_margin + col_width * 3, y_pos, "Sub Department")
-    y_pos -= 4 * mm
-
-    # Data
-    c.setFillColor(TEXT_COLOR)
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(left_margin, y_pos, str(row.get("Employee ID", 'N/A')))
-    
-    date_joined_str = str(row.get("Date of Joining", 'N/A'))
-    try:
-        date_obj = pd.to_datetime(date_joined_str)
-        formatted_date = date_obj.strftime("%d %b %Y").upper()
-    except (ValueError, TypeError):
-        formatted_date = date_joined_str
-    
-    c.drawString(left_margin + col_width, y_pos, formatted_date)
-    c.drawString(left_margin + col_width * 2, y_pos, str(row.get("Department", 'N/A')))
-    c.drawString(left_margin + col_width * 3, y_pos, str(row.get("Sub Department", 'N/A')))
-    y_pos -= 5 * mm
+    for labels, label_y in zip(GRID_LABELS, GRID_LABEL_YS):
+        for i, label in enumerate(labels):
+            c.drawString(LEFT_MARGIN + i * GRID_COL_WIDTH, label_y, label)
     c.setStrokeColor(LINE_COLOR)
-    c.line(left_margin, y_pos, left_margin + usable_width, y_pos)
-    y_pos -= 5 * mm
+    for rule_y in GRID_RULE_YS:
+        c.line(LEFT_MARGIN, rule_y, LEFT_MARGIN + USABLE_WIDTH, rule_y)
 
-    # ----- Employee Details Grid 2 -----
-    # Titles
-    c.setFillColor(LABEL_COLOR)
-    c.setFont("Helvetica", 7)
-    c.drawString(left_margin, y_pos, "Designation")
-    c.drawString(left_margin + col_width, y_pos, "Payment Mode")
-    c.drawString(left_margin + col_width * 2, y_pos, "Bank")
-    c.drawString(left_margin + col_width * 3, y_pos, "Bank IFSC")
-    y_pos -= 4 * mm
-    
-    # Data
+    # Salary details section frame and day-count headers
+    c.setStrokeColor(TEXT_COLOR)
+    c.setLineWidth(1.5)
+    c.line(LEFT_MARGIN, SALARY_RULE_Y, LEFT_MARGIN + USABLE_WIDTH, SALARY_RULE_Y)
+    c.setFont("Helvetica-Bold", 10)
     c.setFillColor(TEXT_COLOR)
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(left_margin, y_pos, str(row.get("Designation", 'N/A')))
-    c.drawString(left_margin + col_width, y_pos, str(row.get("Payment Mode", 'N/A')))
-    c.drawString(left_margin + col_width * 2, y_pos, str(row.get("Bank", 'N/A')))
-    c.drawString(left_margin + col_width * 3, y_pos, str(row.get("Bank IFSC", 'N/A')))
-    y_pos -= 5 * mm
-    c.setStrokeColor(LINE_COLOR)
-    c.line(left_margin, y_pos, left_margin + usable_width, y_pos)
-    y_pos -= 5 * mm
-    
-    # ----- Employee Details Grid 3 -----
-    # Titles
+    c.drawString(LEFT_MARGIN, SALARY_TITLE_Y, "SALARY DETAILS")
+    c.setLineWidth(0.5)
+    c.line(LEFT_MARGIN, SALARY_RULE2_Y, LEFT_MARGIN + USABLE_WIDTH, SALARY_RULE2_Y)
+
     c.setFillColor(LABEL_COLOR)
     c.setFont("Helvetica", 7)
-    c.drawString(left_margin, y_pos, "Bank Account")
-    c.drawString(left_margin + col_width, y_pos, "PAN")
-    c.drawString(left_margin + col_width * 2, y_pos, "UAN")
-    c.drawString(left_margin + col_width * 3, y_pos, "PF Number")
-    y_pos -= 4 * mm
-    
-    # Data
-    c.setFillColor(TEXT_COLOR)
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(left_margin, y_pos, str(row.get("Bank Account", 'N/A')))
-    c.drawString(left_margin + col_width, y_pos, str(row.get("PAN", 'N/A')))
-    c.drawString(left_margin + col_width * 2, y_pos, str(row.get("UAN", 'N/A')))
-    c.drawString(left_margin + col_width * 3, y_pos, str(row.get("PF Number", 'N/A')))
-    y_pos -= 5 * mm
+    for i, header in enumerate(DAYS_TABLE_HEADERS):
+        c.drawString(LEFT_MARGIN + i * DAYS_COL_WIDTH, DAYS_HEADER_Y, header)
     c.setStrokeColor(LINE_COLOR)
-    c.line(left_margin, y_pos, left_margin + usable_width, y_pos)
-    y_pos -= 10 * mm
+    c.line(LEFT_MARGIN, DAYS_RULE_Y, LEFT_MARGIN + USABLE_WIDTH, DAYS_RULE_Y)
 
-    # ----- Salary Details Section -----
-    c.setStrokeColor(TEXT_COLOR)
-    c.setLineWidth(1.5)
-    c.line(left_margin, y_pos, left_margin + usable_width, y_pos)
-    y_pos -= 5 * mm
-    
+    # Earnings/deductions chrome: vertical divider and column titles
+    c.setLineWidth(1)
+    c.line(RIGHT_COL_X, COLUMNS_TOP_Y + 5 * mm, RIGHT_COL_X, COLUMNS_TOP_Y - 60 * mm)
     c.setFont("Helvetica-Bold", 10)
     c.setFillColor(TEXT_COLOR)
-    c.drawString(left_margin, y_pos, "SALARY DETAILS")
-    y_pos -= 5 * mm
-    
-    c.setLineWidth(0.5)
-    c.line(left_margin, y_pos, left_margin + usable_width, y_pos)
-    y_pos -= 5 * mm
-    
-    try:
-        total_working_days = float(row.get("Total Working Days", 0))
-        actual_payable_days = float(row.get("Actual Payable Days", 0))
-    except (ValueError, TypeError):
-        total_working_days = 0.0
-        actual_payable_days = 0.0
-    
+    c.drawString(LEFT_MARGIN, COLUMNS_TOP_Y, "EARNINGS")
+    c.drawString(RIGHT_COL_X + HORIZONTAL_PADDING, COLUMNS_TOP_Y, "TAXES & DEDUCTIONS")
+
+    c.restoreState()
+    c.endForm()
+    c.doForm("payslip_chrome")
+
+# Per-employee render data, cached per process. For SEND_ALL_PAST_PAYSLIPS
+# runs every month of an employee shares the same "shape" — same grid
+# strings, same amount rows, same totals — so the formatting work is done
+# once and each month's page only stamps the month/year on top of it.
+_RENDER_DATA_CACHE = {}
+
+def _payslip_render_data(row):
+    """Preformat everything on the page that doesn't depend on the month."""
+    grid_values = (
+        (str(row.get("Employee ID", 'N/A')), str(row.get("Date of Joining Display", "N/A")),
+         str(row.get("Department", 'N/A')), str(row.get("Sub Department", 'N/A'))),
+        (str(row.get("Designation", 'N/A')), str(row.get("Payment Mode", 'N/A')),
+         str(row.get("Bank", 'N/A')), str(row.get("Bank IFSC", 'N/A'))),
+        (str(row.get("Bank Account", 'N/A')), str(row.get("PAN", 'N/A')),
+         str(row.get("UAN", 'N/A')), str(row.get("PF Number", 'N/A'))),
+    )
+
+    total_working_days = row.get("Total Working Days", 0.0)
+    actual_payable_days = row.get("Actual Payable Days", 0.0)
     loss_of_pay_days = total_working_days - actual_payable_days
     days_payable = actual_payable_days
 
-    # Salary Details table
-    c.setLineWidth(0.5)
-    c.setFillColor(LABEL_COLOR)
-    c.setFont("Helvetica", 7)
-    table_headers = ["Actual Payable Days", "Total Working Days", "Loss of Pay Days", "Days Payable"]
-    table_values = [
+    table_values = (
         f"{actual_payable_days}",
         f"{total_working_days}",
         f"{loss_of_pay_days}",
         f"{days_payable}"
-    ]
-    
-    col_width_details = usable_width / len(table_headers)
-    
-    for i, header in enumerate(table_headers):
-        c.drawString(left_margin + i * col_width_details, y_pos, header)
-    y_pos -= 4 * mm
-    
-    c.setFillColor(TEXT_COLOR)
-    c.setFont("Helvetica-Bold", 9)
-    for i, value in enumerate(table_values):
-        c.drawString(left_margin + i * col_width_details, y_pos, value)
-    y_pos -= 5 * mm
-    c.setStrokeColor(LINE_COLOR)
-    c.line(left_margin, y_pos, left_margin + usable_width, y_pos)
-    y_pos -= 10 * mm
-    
-    # ----- Earnings and Deductions Columns -----
-    # Vertical divider line
-    c.setStrokeColor(LINE_COLOR)
-    c.setLineWidth(1)
-    c.line(left_margin + usable_width * 0.5, y_pos + 5 * mm, left_margin + usable_width * 0.5, y_pos - 60 * mm)
-
-    left_col_x = left_margin
-    right_col_x = left_margin + usable_width * 0.5
-    col_width_sal = usable_width * 0.5
-    horizontal_padding = 5 * mm
+    )
 
-    # Earnings block
-    c.setFont("Helvetica-Bold", 10)
-    c.setFillColor(TEXT_COLOR)
-    c.drawString(left_col_x, y_pos, "EARNINGS")
-    y_earn = y_pos - 7*mm
-    
+    earn_items = []
     total_earn = 0.0
-    c.setFont("Helvetica", 8.5)
-    
-    prorate_items = ["Basic", "HRA", "Special Allowance"]
-    for label in prorate_items:
-        amt = row.get(label, 0)
-        try:
-            amt_f = float(amt) if pd.notna(amt) else 0.0
-        except Exception:
-            amt_f = 0.0
-
+    for label in PRORATE_ITEMS:
+        amt_f = row.get(label, 0.0)
         prorated_amt = (amt_f / total_working_days) * actual_payable_days if total_working_days > 0 else 0
-        
-        c.drawString(left_col_x, y_earn, label)
-        c.drawRightString(left_col_x + col_width_sal - 4*mm, y_earn, f"{prorated_amt:,.2f}")
-        y_earn -= 5*mm
+        earn_items.append((label, f"{prorated_amt:,.2f}"))
         total_earn += prorated_amt
-    
-    non_prorate_items = ["Medical Allowance", "Transport Allowance", "Professional Allowance", "Performance Pay", "Courier Reimb"]
-    for label in non_prorate_items:
-        amt = row.get(label, 0)
-        try:
-            amt_f = float(amt) if pd.notna(amt) else 0.0
-        except Exception:
-            amt_f = 0.0
-        
-        c.drawString(left_col_x, y_earn, label)
-        c.drawRightString(left_col_x + col_width_sal - 4*mm, y_earn, f"{amt_f:,.2f}")
-        y_earn -= 5*mm
+
+    for label in NON_PRORATE_ITEMS:
+        amt_f = row.get(label, 0.0)
+        earn_items.append((label, f"{amt_f:,.2f}"))
         total_earn += amt_f
 
-    pb_earn = float(row.get("Performance Bonus", 0)) if pd.notna(row.get("Performance Bonus", 0)) else 0.0
+    pb_earn = row.get("Performance Bonus", 0.0)
     if pb_earn > 0:
-        c.drawString(left_col_x, y_earn, "Performance Bonus")
-        c.drawRightString(left_col_x + col_width_sal - 4*mm, y_earn, f"{pb_earn:,.2f}")
-        y_earn -= 5*mm
+        earn_items.append(("Performance Bonus", f"{pb_earn:,.2f}"))
         total_earn += pb_earn
-    
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(left_col_x, y_earn - 3*mm, "Total Earnings (A)")
-    c.drawRightString(left_col_x + col_width_sal - 4*mm, y_earn - 3*mm, f"{total_earn:,.2f}")
 
-    # Deductions block
-    y_pos_ded = y_pos
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(right_col_x + horizontal_padding, y_pos_ded, "TAXES & DEDUCTIONS")
-    y_ded = y_pos_ded - 7*mm
+    ded_items = []
     total_ded = 0.0
-    
-    c.setFont("Helvetica", 8.5)
-
-    pt_amt = float(row.get("Professional Tax", 0)) if pd.notna(row.get("Professional Tax", 0)) else 0.0
-    c.drawString(right_col_x + horizontal_padding, y_ded, "Professional Tax")
-    c.drawRightString(right_col_x + col_width_sal - 4*mm, y_ded, f"{pt_amt:,.2f}")
-    y_ded -= 5 * mm
+    pt_amt = row.get("Professional Tax", 0.0)
+    ded_items.append(("Professional Tax", f"{pt_amt:,.2f}"))
     total_ded += pt_amt
 
-    pf_amt = float(row.get("PF", 0)) if pd.notna(row.get("PF", 0)) and float(row.get("PF", 0)) > 0 else 0.0
+    pf_amt = row.get("PF", 0.0)
     if pf_amt > 0:
-        c.drawString(right_col_x + horizontal_padding, y_ded, "PF (Provident Fund)")
-        c.drawRightString(right_col_x + col_width_sal - 4*mm, y_ded, f"{pf_amt:,.2f}")
-        y_ded -= 5 * mm
+        ded_items.append(("PF (Provident Fund)", f"{pf_amt:,.2f}"))
         total_ded += pf_amt
-    
-    pb_recovery = float(row.get("Performance Bonus Recovery", 0)) if pd.notna(row.get("Performance Bonus Recovery", 0)) else 0.0
+
+    pb_recovery = row.get("Performance Bonus Recovery", 0.0)
     if pb_recovery > 0:
-        c.drawString(right_col_x + horizontal_padding, y_ded, "Performance Bonus")
-        c.drawRightString(right_col_x + col_width_sal - 4*mm, y_ded, f"{pb_recovery:,.2f}")
-        y_ded -= 5*mm
+        ded_items.append(("Performance Bonus", f"{pb_recovery:,.2f}"))
         total_ded += pb_recovery
-    
-    c.setFont("Helvetica-Bold", 8)
-    c.drawString(right_col_x + horizontal_padding, y_ded - 3*mm, "Total Deductions (C)")
-    c.drawRightString(right_col_x + col_width_sal - 4*mm, y_ded - 3*mm, f"{total_ded:,.2f}")
 
-    # Bottom line
-    y_summary = min(y_earn, y_ded) - 20*mm
-    c.setLineWidth(1.5)
-    c.setStrokeColor(TEXT_COLOR)
-    c.line(left_margin, y_summary, left_margin + usable_width, y_summary)
-    
-    # ----- Summary Section -----
-    y_summary -= 5 * mm
     net_salary = total_earn - total_ded
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(left_margin, y_summary, "Net Salary Payable (A-C)")
-    c.drawRightString(left_margin + usable_width, y_summary, f"{net_salary:,.2f}")
-    y_summary -= 7 * mm
-    
-    c.setFont("Helvetica", 8)
-    net_int = int(round(net_salary))
-    words = num_to_words_indian(net_int) + " only"
-    c.drawString(left_margin, y_summary, "Net Salary in words")
-    c.drawRightString(left_margin + usable_width, y_summary, words)
-    
-    y_summary -= 15*mm
 
-    # ----- Footer -----
-    c.setFont("Helvetica", 7)
-    c.setFillColor(PAYSLIP_REGULAR_COLOR)
-    c.drawString(left_margin, y_summary, "Note: All amounts displayed in this payslip are in INR")
-    c.drawString(left_margin, y_summary - 5*mm, "This is computer generated statement, does not require signature.")
+    return {
+        "fullname": str(row.get("FullName", "")).upper(),
+        "grid_values": grid_values,
+        "table_values": table_values,
+        "earn_items": tuple(earn_items),
+        "ded_items": tuple(ded_items),
+        "total_earn": f"{total_earn:,.2f}",
+        "total_ded": f"{total_ded:,.2f}",
+        "net_salary": f"{net_salary:,.2f}",
+        "net_words": num_to_words_indian(int(round(net_salary))) + " only",
+    }
 
-    c.showPage()
-    c.save()
+def create_payslip_pdf(row, month_name, year, out_pdf_path, logo_svg_code):
+    """
+    Create the PDF matching the provided design.
+    """
+    emp_id = row.get("Employee ID")
+    data = _RENDER_DATA_CACHE.get(emp_id)
+    if data is None:
+        data = _payslip_render_data(row)
+        if emp_id is not None:
+            _RENDER_DATA_CACHE[emp_id] = data
+
+    # Hand the canvas an open file handle so save() streams the finished
+    # document straight to it instead of re-opening the path by name.
+    out_file = open(out_pdf_path, "wb")
+    try:
+        c = canvas.Canvas(out_file, pagesize=A4)
+
+        _draw_static_chrome(c)
+
+        # ----- Header Section -----
+        # Month/year beside the static "PAYSLIP" title
+        c.setFillColor(PAYSLIP_REGULAR_COLOR)
+        c.setFont("Helvetica", 18)
+        c.drawString(LEFT_MARGIN + TITLE_WIDTH, TITLE_Y, f" {month_name.upper()} {year}")
+
+        # Right side: Logo
+        if logo_svg_code:
+            try:
+                from reportlab.graphics import renderPDF
+                drawing = _get_logo_drawing(logo_svg_code)
+
+                logo_x = PAGE_WIDTH - RIGHT_MARGIN - drawing.width
+                logo_y = TOP_MARGIN - drawing.height - 10*mm
+
+                renderPDF.draw(drawing, c, logo_x, logo_y)
+            except Exception as e:
+                logger.warning(f"SVG render failed from embedded code: {e}")
+
+        # ----- Employee Name (rule below it is chrome) -----
+        c.setFillColor(TEXT_COLOR)
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(LEFT_MARGIN, EMP_NAME_Y, data["fullname"])
+
+        # ----- Employee Details Grids (values only; labels are chrome) -----
+        c.setFont("Helvetica-Bold", 9)
+        for values, data_y in zip(data["grid_values"], GRID_DATA_YS):
+            for i, value in enumerate(values):
+                c.drawString(LEFT_MARGIN + i * GRID_COL_WIDTH, data_y, value)
+
+        # ----- Salary Details (day counts; frame and headers are chrome) -----
+        for i, value in enumerate(data["table_values"]):
+            c.drawString(LEFT_MARGIN + i * DAYS_COL_WIDTH, DAYS_VALUES_Y, value)
+
+        # ----- Earnings and Deductions (titles and divider are chrome) -----
+        # Earnings block
+        c.setFont("Helvetica", 8.5)
+        y_earn = _draw_amount_rows(c, LEFT_MARGIN, AMOUNT_RIGHT_X, ITEMS_TOP_Y, data["earn_items"])
+        c.setFont("Helvetica-Bold", 9)
+        c.drawString(LEFT_MARGIN, y_earn - 3*mm, "Total Earnings (A)")
+        c.drawRightString(AMOUNT_RIGHT_X, y_earn - 3*mm, data["total_earn"])
+
+        # Deductions block
+        c.setFont("Helvetica", 8.5)
+        y_ded = _draw_amount_rows(c, RIGHT_COL_X + HORIZONTAL_PADDING, DED_AMOUNT_RIGHT_X, ITEMS_TOP_Y, data["ded_items"])
+        c.setFont("Helvetica-Bold", 8)
+        c.drawString(RIGHT_COL_X + HORIZONTAL_PADDING, y_ded - 3*mm, "Total Deductions (C)")
+        c.drawRightString(DED_AMOUNT_RIGHT_X, y_ded - 3*mm, data["total_ded"])
+
+        # Bottom line
+        y_summary = min(y_earn, y_ded) - 20*mm
+        c.setLineWidth(1.5)
+        c.setStrokeColor(TEXT_COLOR)
+        c.line(LEFT_MARGIN, y_summary, LEFT_MARGIN + USABLE_WIDTH, y_summary)
+
+        # ----- Summary Section -----
+        y_summary -= 5 * mm
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(LEFT_MARGIN, y_summary, "Net Salary Payable (A-C)")
+        c.drawRightString(LEFT_MARGIN + USABLE_WIDTH, y_summary, data["net_salary"])
+        y_summary -= 7 * mm
+
+        c.setFont("Helvetica", 8)
+        c.drawString(LEFT_MARGIN, y_summary, "Net Salary in words")
+        c.drawRightString(LEFT_MARGIN + USABLE_WIDTH, y_summary, data["net_words"])
+
+        y_summary -= 15*mm
+
+        # ----- Footer -----
+        c.setFont("Helvetica", 7)
+        c.setFillColor(PAYSLIP_REGULAR_COLOR)
+        c.drawString(LEFT_MARGIN, y_summary, "Note: All amounts displayed in this payslip are in INR")
+        c.drawString(LEFT_MARGIN, y_summary - 5*mm, "This is computer generated statement, does not require signature.")
+        c.showPage()
+        c.save()
+    finally:
+        out_file.close()
+
+
+def _build_one(row_dict, month_name, year, out_pdf_path, logo_svg_code):
+    """Picklable worker: build one payslip PDF in a child process."""
+    create_payslip_pdf(row_dict, month_name, year, out_pdf_path, logo_svg_code)
+    return out_pdf_path
 
 
 # -------------------------
 # ========== EMAIL =========
 # -------------------------
-def send_email_with_attachment(to_email, subject, body, attachment_path):
+# SMTP reply codes that indicate a transient problem worth one reconnect+retry.
+RETRYABLE_SMTP_CODES = (421, 450, 454)
+
+# Subject/body skeletons are constant across the run; only the employee
+# name and month vary, filled in via str.format.
+EMAIL_SUBJECT_TEMPLATE = f"Payslip For {{month}} {{year}} - {COMPANY_NAME}"
+EMAIL_BODY_TEMPLATE = (
+    "Dear {fullname},\n\n"
+    "Please find enclosed Payslip for the month of {month} {year}. "
+    "We suggest that you save it in your personal records for any future reference.\n\n"
+    "Important:\n"
+    "- Please ensure that you check the entries in your payslip and for any queries or concerns, "
+    "you may approach your HR Manager or Payroll Admin.\n\n"
+    f"Regards,\n{EMAIL_CONFIG.get('FROM_NAME')}"
+)
+
+def open_smtp():
+    """Open a single SMTP connection and log in. Reused for all recipients."""
+    import smtplib
+    cfg = EMAIL_CONFIG
+    if cfg.get("USE_TLS", True):
+        server = smtplib.SMTP(cfg["SMTP_HOST"], cfg["SMTP_PORT"], timeout=30)
+        server.ehlo()
+        server.starttls()
+        server.login(cfg["SMTP_USERNAME"], cfg["SMTP_PASSWORD"])
+    else:
+        server = smtplib.SMTP_SSL(cfg["SMTP_HOST"], cfg["SMTP_PORT"], timeout=30)
+        server.login(cfg["SMTP_USERNAME"], cfg["SMTP_PASSWORD"])
+    return server
+
+def send_email_with_attachment(server, to_email, subject, body, pdf_data, filename):
+    """Send one payslip over an already-open SMTP connection.
+
+    Takes the attachment as bytes so this function never touches disk — the
+    caller reads the PDF once and the same bytes serve any retry. Returns
+    (ok, message, server) — the server is returned because a dropped
+    connection is rebuilt and retried once before giving up.
+    """
+    import smtplib
     cfg = EMAIL_CONFIG
     if not cfg.get("SMTP_USERNAME") or not cfg.get("SMTP_PASSWORD"):
         logger.warning("Email credentials not provided - skipping email send.")
-        return False, "SMTP not configured"
+        return False, "SMTP not configured", server
 
-    try:
-        msg = EmailMessage()
-        msg['Subject'] = subject
-        msg['From'] = formataddr((cfg.get("FROM_NAME"), cfg.get("FROM_EMAIL")))
-        msg['To'] = to_email
-        msg.set_content(body)
-
-        with open(attachment_path, "rb") as f:
-            pdf_data = f.read()
-        msg.add_attachment(pdf_data, maintype='application', subtype='pdf', filename=os.path.basename(attachment_path))
-
-        if cfg.get("USE_TLS", True):
-            server = smtplib.SMTP(cfg["SMTP_HOST"], cfg["SMTP_PORT"], timeout=30)
-            server.ehlo()
-            server.starttls()
-            server.login(cfg["SMTP_USERNAME"], cfg["SMTP_PASSWORD"])
-        else:
-            server = smtplib.SMTP_SSL(cfg["SMTP_HOST"], cfg["SMTP_PORT"], timeout=30)
-            server.login(cfg["SMTP_USERNAME"], cfg["SMTP_PASSWORD"])
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = formataddr((cfg.get("FROM_NAME"), cfg.get("FROM_EMAIL")))
+    msg['To'] = to_email
+    msg.set_content(body)
+    msg.add_attachment(pdf_data, maintype='application', subtype='pdf', filename=filename)
 
-        server.send_message(msg)
-        server.quit()
-        logger.info(f"Email sent to {to_email}")
-        return True, "Sent"
-    except Exception as e:
-        logger.exception(f"Failed to send email to {to_email}: {e}")
-        return False, str(e)
+    for attempt in range(2):
+        try:
+            if server is None:
+                server = open_smtp()
+            # Ask for SMTPUTF8 delivery when the server advertises it, so
+            # non-ASCII names/addresses go out as UTF-8 instead of falling
+            # back to lossy re-encoding.
+            mail_options = ["SMTPUTF8"] if server.has_extn("smtputf8") else []
+            server.send_message(msg, mail_options=mail_options)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Email sent to {to_email}")
+            return True, "Sent", server
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+            logger.warning(f"SMTP connection lost ({e}); reconnecting...")
+            server = None
+            if attempt == 0:
+                time.sleep(2 ** attempt)
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code in RETRYABLE_SMTP_CODES and attempt == 0:
+                logger.warning(f"Transient SMTP error {e.smtp_code}; retrying...")
+                time.sleep(2 ** attempt)
+                server = None
+            else:
+                logger.exception(f"Failed to send email to {to_email}: {e}")
+                return False, str(e), server
+        except Exception as e:
+            logger.exception(f"Failed to send email to {to_email}: {e}")
+            return False, str(e), server
+    return False, "Send failed after retry", server
+
+# Reopen a worker's connection after this many messages; providers cap the
+# number of messages accepted per session.
+MAX_MSGS_PER_CONN = 100
+
+def _smtp_worker(task_queue):
+    """Drain email tasks from the queue over one persistent SMTP connection.
+
+    Each worker thread owns its own connection, opened lazily on the first
+    send and recycled every MAX_MSGS_PER_CONN messages.
+    """
+    server = None
+    sent_on_conn = 0
+    try:
+        while True:
+            try:
+                to_email, subject, body, attachment_path = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if server is not None and sent_on_conn >= MAX_MSGS_PER_CONN:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+                server = None
+                sent_on_conn = 0
+            try:
+                with open(attachment_path, "rb") as f:
+                    pdf_data = f.read()
+            except OSError as e:
+                logger.error(f"Could not read attachment {attachment_path}: {e}")
+                continue
+            ok, msg, server = send_email_with_attachment(
+                server, to_email, subject, body, pdf_data, os.path.basename(attachment_path))
+            if ok:
+                sent_on_conn += 1
+            else:
+                logger.error(f"Email failed for {to_email}: {msg}")
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+def send_all_emails(tasks):
+    """Send queued payslip emails in parallel over persistent SMTP sessions."""
+    if not tasks:
+        return
+    task_queue = queue.Queue()
+    for task in tasks:
+        task_queue.put(task)
+    workers = max(1, min(CONCURRENCY, len(tasks)))
+    logger.info(f"Sending {len(tasks)} emails over {workers} SMTP connection(s)...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_smtp_worker, task_queue) for _ in range(workers)]
+        for future in as_completed(futures):
+            future.result()
 
 # -------------------------
 # ========== MAIN ==========
@@ -538,7 +744,7 @@ def main():
         return
 
     try:
-        df = pd.read_excel(EMP_XLSX)
+        df = load_employees(EMP_XLSX)
     except Exception as e:
         logger.exception(f"Failed to read {EMP_XLSX}: {e}")
         return
@@ -547,60 +753,88 @@ def main():
     created_files = []
     
     email_cfg_ready = EMAIL_CONFIG.get("SMTP_USERNAME") and EMAIL_CONFIG.get("SMTP_PASSWORD")
-
-    for idx, row in df.iterrows():
-        if pd.isna(row.get("FullName")) or pd.isna(row.get("Employee ID")):
+    email_tasks = []
+    pdf_jobs = []
+    # Check the log level once; the f-strings in the per-payslip messages are
+    # otherwise formatted even when INFO is suppressed.
+    info_enabled = logger.isEnabledFor(logging.INFO)
+
+    # itertuples is much cheaper than iterrows (no per-row Series); zip the
+    # plain tuples back into the dicts the PDF builder expects.
+    columns = list(df.columns)
+    row_hashes = sent_log.setdefault("row_hashes", {})
+    for values in df.itertuples(index=False, name=None):
+        row_dict = dict(zip(columns, values))
+        if pd.isna(row_dict.get("FullName")) or pd.isna(row_dict.get("Employee ID")):
             continue
-        
-        fullname = str(row.get("FullName")).strip()
-        employee_email = row.get("Email")
-        
-        date_of_joining_str = str(row.get("Date of Joining", 'N/A'))
-        try:
-            date_of_joining = pd.to_datetime(date_of_joining_str)
-        except (ValueError, TypeError):
+
+        emp_id = str(row_dict.get("Employee ID"))
+        # One fingerprint per employee; every month of the run reuses it.
+        row_hash = _row_hash(row_dict)
+        fullname = str(row_dict.get("FullName")).strip()
+        employee_email = row_dict.get("Email")
+
+        date_of_joining = row_dict.get("Date of Joining")
+        if pd.isna(date_of_joining):
             date_of_joining = datetime.now()
 
         start = date_of_joining.replace(day=1)
         end = datetime.now().replace(day=1)
 
-        months_to_process = []
         if SEND_ALL_PAST_PAYSLIPS:
-            while start <= end:
-                months_to_process.append(start)
-                next_month = start.replace(day=28) + pd.Timedelta(days=4)
-                start = next_month.replace(day=1)
+            # One month-start timestamp per month from joining to now.
+            months_to_process = pd.date_range(start, end, freq="MS")
         else:
             months_to_process = [end]
 
         for date_to_process in months_to_process:
             month_name_gen = calendar.month_name[date_to_process.month]
             year_gen = date_to_process.year
-            
+
             emp_folder = PAYSLIPS_DIR / fullname / str(year_gen) / month_name_gen
             emp_folder.mkdir(parents=True, exist_ok=True)
 
             safe_name = f"{fullname}-payslip-{month_name_gen}-{year_gen}.pdf"
             out_pdf = emp_folder / safe_name
 
-            create_payslip_pdf(row, month_name_gen, year_gen, out_pdf, logo_svg_code)
-            logger.info(f"Created payslip: {out_pdf}")
-            created_files.append((row, out_pdf))
+            # Skip the rebuild only when the PDF is on disk AND the row data
+            # it was built from is unchanged (per the hash recorded in the
+            # sent log). A corrected sheet therefore regenerates the stale
+            # months instead of silently re-sending them.
+            hash_key = f"{emp_id}|{year_gen}|{month_name_gen}"
+            if out_pdf.exists() and _row_hash_matches(row_hashes, hash_key, row_hash):
+                if info_enabled:
+                    logger.info(f"Payslip up to date, skipping generation: {out_pdf}")
+            else:
+                pdf_jobs.append((row_dict, month_name_gen, year_gen, str(out_pdf), logo_svg_code))
+            row_hashes[hash_key] = row_hash
+            created_files.append((row_dict, out_pdf))
 
             if pd.isna(employee_email) or not employee_email:
                 logger.warning(f"No email for {fullname}, skipping email for this payslip.")
                 continue
 
-            subject = f"Payslip For {month_name_gen} {year_gen} - {COMPANY_NAME}"
-            body = f"Dear {fullname},\n\nPlease find enclosed Payslip for the month of {month_name_gen} {year_gen}. We suggest that you save it in your personal records for any future reference.\n\nImportant:\n- Please ensure that you check the entries in your payslip and for any queries or concerns, you may approach your HR Manager or Payroll Admin.\n\nRegards,\n{EMAIL_CONFIG.get('FROM_NAME')}"
+            subject = EMAIL_SUBJECT_TEMPLATE.format(month=month_name_gen, year=year_gen)
+            body = EMAIL_BODY_TEMPLATE.format(fullname=fullname, month=month_name_gen, year=year_gen)
 
             if email_cfg_ready:
-                ok, msg = send_email_with_attachment(employee_email, subject, body, str(out_pdf))
-                if not ok:
-                    logger.error(f"Email failed for {employee_email}: {msg}")
-            else:
+                email_tasks.append((employee_email, subject, body, str(out_pdf)))
+            elif info_enabled:
                 logger.info(f"Email not configured. Skipping email for {employee_email} (payslip created).")
 
+    # PDF builds are pure CPU (ReportLab draw calls) and independent per row,
+    # so fan them out across processes to sidestep the GIL.
+    if pdf_jobs:
+        workers = max(1, min(os.cpu_count() or 1, len(pdf_jobs)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_build_one, *job) for job in pdf_jobs]
+            for future in as_completed(futures):
+                out_path = future.result()
+                if info_enabled:
+                    logger.info(f"Created payslip: {out_path}")
+
+    send_all_emails(email_tasks)
+
     sent_log["last_sent"] = sent_key
     sent_log.setdefault("history", []).append({
         "month": month_name,
@@ -608,6 +842,8 @@ def main():
         "timestamp": datetime.now().isoformat(),
         "created": [str(p) for (_, p) in created_files]
     })
+    # Keep the log bounded; older runs aren't consulted by anything.
+    sent_log["history"] = sent_log["history"][-50:]
     save_sent_log(sent_log)
     logger.info("Payslip generation process completed. Thank you Arun")
 
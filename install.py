@@ -34,6 +34,7 @@ def main():
         with open("requirements.txt", "w") as f:
             f.write("pandas\n")
             f.write("openpyxl\n")
+            f.write("python-calamine\n") # faster Excel reader; pandas uses it automatically via engine="calamine"
             f.write("reportlab\n")
             f.write("svglib\n")
             f.write("pydyf\n") # pydyf is a dependency of svglib